@@ -12,4 +12,47 @@ for interacting with cloud services through the MCP API.
 from . import aws
 from . import azure
 
-__all__ = ['aws', 'azure']
\ No newline at end of file
+__all__ = ['aws', 'azure']
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+
+async def warm_providers() -> None:
+    """Warm the provider credential/token caches ahead of the first tool call.
+
+    First-call latency is dominated by the AAD/STS token exchange (seconds);
+    fetching tokens in the background at startup moves that network I/O off the
+    p99 critical path. Each warm-up is best-effort: missing credentials just
+    mean that provider warms on first real use instead.
+    """
+    from src.utils import get_provider_executor
+
+    def _warm_aws():
+        from .aws import get_aws_session
+
+        get_aws_session().client("sts").get_caller_identity()
+
+    def _warm_azure():
+        from .azure import get_azure_credential
+
+        credential, _ = get_azure_credential()
+        credential.get_token("https://management.azure.com/.default")
+
+    def _warm_hetzner():
+        from .hetzner import get_hetzner_client
+
+        get_hetzner_client().locations.get_all()
+
+    executor = get_provider_executor()
+    futures = {
+        name: asyncio.wrap_future(executor.submit(fn))
+        for name, fn in (("aws", _warm_aws), ("azure", _warm_azure), ("hetzner", _warm_hetzner))
+    }
+    for name, future in futures.items():
+        try:
+            await future
+            log.debug("%s provider warmed", name)
+        except Exception as e:
+            log.debug("%s warm-up skipped: %s", name, e)
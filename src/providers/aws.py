@@ -1,82 +1,208 @@
 import asyncio
 import json
+import logging
 import os
-import traceback
-from contextlib import redirect_stderr, redirect_stdout
+import threading
 from datetime import datetime, timedelta
-from io import StringIO
+from functools import lru_cache
 from typing import Any, Dict
 
-import boto3
+from src.utils import (
+    compile_user_code,
+    error_payload,
+    get_provider_executor,
+    interrupt_thread,
+    make_runner,
+    run_captured_tracked,
+    sanitize_python_code,
+)
 
-from src.utils import sanitize_python_code
+log = logging.getLogger(__name__)
 
+# Cap concurrent executions so a burst of tool calls doesn't trigger
+# downstream throttling and retry cascades
+_aws_sem = asyncio.Semaphore(int(os.getenv("AWS_MAX_CONC", "16")))
 
-def get_aws_session():
-    profile_name = os.getenv("AWS_PROFILE")
-    role = os.getenv("AWS_ROLE")
-    session = boto3.Session(
-        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+# (role_arn, base-credential tuple) -> session for assumed-role sessions
+# (credentials self-refresh); keying on the base credentials too keeps callers
+# with different underlying identities from aliasing to one role session
+_role_sessions: Dict[Any, Any] = {}
+_role_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _boto_config():
+    """Shared botocore Config for every client built off our cached sessions.
+
+    The default connection pool caps a client at 10 in-flight requests, which
+    serializes the parallel list_* patterns the tool docstrings encourage; the
+    adaptive retry mode also backs off client-side instead of hammering a
+    throttled API.
+    """
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=50,
+        retries={"max_attempts": 5, "mode": "adaptive"},
         region_name=os.getenv("AWS_DEFAULT_REGION"),
+        # Keepalives hold warm TCP connections open between bursts so repeat
+        # calls skip the TCP/TLS handshake entirely
+        tcp_keepalive=True,
     )
+
+
+def _memoize_clients(session):
+    """Patch session.client so repeat lookups reuse the same client object.
+
+    boto3 client construction loads and parses the service JSON model on every
+    call, which costs tens of milliseconds per service. User snippets routinely
+    call session.client("s3") on each invocation, so memoize by the client
+    arguments. Unhashable arguments (e.g. a botocore Config) bypass the cache.
+    """
+    raw_client = session.client
+    cache = {}
+
+    def client(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            cached = cache.get(key)
+        except TypeError:
+            return raw_client(*args, **kwargs)
+        if cached is None:
+            cached = cache[key] = raw_client(*args, **kwargs)
+        return cached
+
+    session.client = client
+    session._session.set_default_client_config(_boto_config())
+    return session
+
+
+@lru_cache(maxsize=None)
+def _base_session(access_key_id, secret_access_key, region, profile_name):
+    """Build (and cache) a boto3.Session for a given credential tuple.
+
+    Session construction walks the botocore credential-provider chain and parses
+    ~/.aws config files, so repeated calls with the same credentials should reuse
+    the same Session object instead of paying that cost per tool invocation.
+    """
+    import boto3  # deferred so the SDK is only loaded when AWS is used
+
     if profile_name:
-        print(f"Using profile: {profile_name}")
-        session = boto3.Session(profile_name=profile_name)
-    if role:
-        print(f"Assuming role: {role}")
-        sts = session.client("sts")
-        response = sts.assume_role(RoleArn=role, RoleSessionName="MiSesion", DurationSeconds=3600)
-        session = boto3.Session(
-            aws_access_key_id=response["Credentials"]["AccessKeyId"],
-            aws_secret_access_key=response["Credentials"]["SecretAccessKey"],
-            aws_session_token=response["Credentials"]["SessionToken"],
+        log.debug("Using profile: %s", profile_name)
+        return _memoize_clients(boto3.Session(profile_name=profile_name))
+    log.debug("Creating session with default credentials")
+    return _memoize_clients(
+        boto3.Session(
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            region_name=region,
+        )
+    )
+
+
+def _assume_role_session(session, role, base_key):
+    """Return a cached session whose assumed-role credentials refresh themselves.
+
+    Instead of storing the static STS response (which expires after DurationSeconds
+    and would fail mid-execution), wire botocore's DeferredRefreshableCredentials to
+    an assume_role refresher so credentials are fetched lazily and renewed in the
+    background shortly before expiry.
+    """
+    import boto3
+    import botocore.session
+    from botocore.credentials import DeferredRefreshableCredentials
+
+    cache_key = (role, base_key)
+    with _role_lock:
+        cached = _role_sessions.get(cache_key)
+        if cached is not None:
+            return cached
+        log.debug("Assuming role: %s", role)
+        sts = session.client("sts", config=_boto_config())
+
+        def _refresh():
+            response = sts.assume_role(RoleArn=role, RoleSessionName="MiSesion", DurationSeconds=3600)
+            credentials = response["Credentials"]
+            return {
+                "access_key": credentials["AccessKeyId"],
+                "secret_key": credentials["SecretAccessKey"],
+                "token": credentials["SessionToken"],
+                "expiry_time": credentials["Expiration"].isoformat(),
+            }
+
+        botocore_session = botocore.session.get_session()
+        botocore_session._credentials = DeferredRefreshableCredentials(
+            refresh_using=_refresh, method="sts-assume-role"
         )
-    else:
-        print("Creating session with default credentials")
+        region = os.getenv("AWS_DEFAULT_REGION")
+        if region:
+            botocore_session.set_config_variable("region", region)
+        role_session = _memoize_clients(boto3.Session(botocore_session=botocore_session))
+        _role_sessions[cache_key] = role_session
+        return role_session
+
+
+@lru_cache(maxsize=1)
+def _ns_template() -> Dict[str, Any]:
+    """Static portion of the exec namespace, built once and copied per call."""
+    import boto3
+
+    return {"boto3": boto3, "json": json, "datetime": datetime, "timedelta": timedelta}
+
+
+def get_aws_session():
+    if os.getenv("AWS_ACCESS_KEY_ID") or os.getenv("AWS_PROFILE"):
+        # Explicit credentials make the IMDS lookup pointless; disabling it saves
+        # botocore's ~1s metadata-service timeout on non-EC2 hosts.
+        os.environ.setdefault("AWS_EC2_METADATA_DISABLED", "true")
+    base_key = (
+        os.getenv("AWS_ACCESS_KEY_ID"),
+        os.getenv("AWS_SECRET_ACCESS_KEY"),
+        os.getenv("AWS_DEFAULT_REGION"),
+        os.getenv("AWS_PROFILE"),
+    )
+    session = _base_session(*base_key)
+    role = os.getenv("AWS_ROLE")
+    if role:
+        session = _assume_role_session(session, role, base_key)
     return session
 
 
 async def boto3_execute(
     code: str,
 ) -> Dict[str, Any]:
-    # Build execution namespace based on context
-    namespace = {
-        "boto3": boto3,
-        "json": json,
-        "datetime": datetime,
-        "timedelta": timedelta,
-        "session": get_aws_session(),
-    }
+    # Copy the prebuilt namespace and bind the per-call session
+    namespace = _ns_template().copy()
+    namespace["session"] = get_aws_session()
 
     try:
-        # Use asyncio.wait_for for timeout
-        output_capture = StringIO()
-        error_capture = StringIO()
         code = sanitize_python_code(code)
-        print(code)
-        with redirect_stdout(output_capture), redirect_stderr(error_capture):
-            # Execute with timeout
-            await asyncio.wait_for(
-                asyncio.get_event_loop().run_in_executor(None, lambda: exec(code, namespace)),
+        code_obj = compile_user_code(code, "<boto3-exec>")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Executing AWS code: %.100s...", code)
+        # Execute with timeout; output is captured per worker thread
+        # submit() skips the contextvars copy run_in_executor performs per call;
+        # the exec'd snippet never reads caller context variables
+        worker_info = {}
+        async with _aws_sem:
+            _, output, errors = await asyncio.wait_for(
+                asyncio.wrap_future(
+                    get_provider_executor().submit(
+                        run_captured_tracked, make_runner(code_obj, namespace), worker_info
+                    )
+                ),
                 timeout=None,
             )
 
-        output = output_capture.getvalue()
-        errors = error_capture.getvalue()
-
         return {"success": True, "output": output, "errors": errors if errors else None}
 
     except asyncio.TimeoutError:
+        # Reclaim the executor thread instead of leaking it mid-execution
+        interrupt_thread(worker_info.get("thread_id"))
         return {
             "success": False,
             "error": "Code execution timed out after 30 seconds",
             "error_type": "TimeoutError",
         }
     except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "error_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
-        }
+        return error_payload(e)
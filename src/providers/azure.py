@@ -1,21 +1,54 @@
 import asyncio
 import json
+import logging
 import os
-import traceback
-from contextlib import redirect_stderr, redirect_stdout
+import threading
 from datetime import datetime, timedelta
-from io import StringIO
+from functools import lru_cache
 from typing import Any, Dict
 
-# Azure imports
-from azure.identity import ClientSecretCredential, DefaultAzureCredential
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.monitor import MonitorManagementClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.storage import StorageManagementClient
+from src.utils import (
+    compile_user_code,
+    error_payload,
+    get_provider_executor,
+    interrupt_thread,
+    make_runner,
+    run_captured_tracked,
+    sanitize_python_code,
+)
 
-from src.utils import sanitize_python_code
+log = logging.getLogger(__name__)
+
+# Cap concurrent executions so a burst of tool calls doesn't trigger
+# downstream throttling and retry cascades
+_azure_sem = asyncio.Semaphore(int(os.getenv("AZURE_MAX_CONC", "16")))
+
+# (tenant_id, client_id) -> credential; reusing the object keeps its in-memory
+# AAD token cache alive so repeat calls skip the OAuth2 token exchange
+_credential_cache: Dict[Any, Any] = {}
+_credential_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _mgmt_client_classes() -> Dict[str, Any]:
+    """Import the management client classes on first use.
+
+    The five azure.mgmt.* packages pull in tens of MB of bytecode; deferring
+    them keeps server startup fast for deployments that never touch Azure.
+    """
+    from azure.mgmt.compute import ComputeManagementClient
+    from azure.mgmt.monitor import MonitorManagementClient
+    from azure.mgmt.network import NetworkManagementClient
+    from azure.mgmt.resource import ResourceManagementClient
+    from azure.mgmt.storage import StorageManagementClient
+
+    return {
+        "ComputeManagementClient": ComputeManagementClient,
+        "StorageManagementClient": StorageManagementClient,
+        "ResourceManagementClient": ResourceManagementClient,
+        "NetworkManagementClient": NetworkManagementClient,
+        "MonitorManagementClient": MonitorManagementClient,
+    }
 
 
 def get_azure_credential():
@@ -41,19 +74,31 @@ def get_azure_credential():
     tenant_id = os.getenv("AZURE_TENANT_ID")
     subscription_id = os.getenv("AZURE_SUBSCRIPTION_ID")
 
-    # Create appropriate credential based on available information
+    # Create appropriate credential based on available information, caching by
+    # identity so the credential's token cache survives across calls
+    from azure.identity import ClientSecretCredential, DefaultAzureCredential
+
     if client_id and client_secret and tenant_id:
-        print("Using Azure service principal authentication")
-        credential = ClientSecretCredential(tenant_id=tenant_id, client_id=client_id, client_secret=client_secret)
+        key = (tenant_id, client_id)
+        with _credential_lock:
+            credential = _credential_cache.get(key)
+            if credential is None:
+                log.debug("Using Azure service principal authentication")
+                credential = _credential_cache[key] = ClientSecretCredential(
+                    tenant_id=tenant_id, client_id=client_id, client_secret=client_secret
+                )
     else:
-        print("Using Azure DefaultAzureCredential (supports CLI, managed identity, etc.)")
-        # DefaultAzureCredential automatically tries multiple authentication methods:
-        # 1. Environment variables
-        # 2. Managed identity
-        # 3. Azure CLI
-        # 4. Azure PowerShell
-        # 5. Interactive browser (if enabled)
-        credential = DefaultAzureCredential()
+        with _credential_lock:
+            credential = _credential_cache.get("default")
+            if credential is None:
+                log.debug("Using Azure DefaultAzureCredential (supports CLI, managed identity, etc.)")
+                # DefaultAzureCredential automatically tries multiple authentication methods:
+                # 1. Environment variables
+                # 2. Managed identity
+                # 3. Azure CLI
+                # 4. Azure PowerShell
+                # 5. Interactive browser (if enabled)
+                credential = _credential_cache["default"] = DefaultAzureCredential()
 
     if not subscription_id:
         raise ValueError("Azure subscription ID is required. Set AZURE_SUBSCRIPTION_ID environment variable.")
@@ -61,84 +106,153 @@ def get_azure_credential():
     return credential, subscription_id
 
 
-def get_azure_clients(credential, subscription_id):
+def get_azure_clients(credential, subscription_id, transport=None):
     """
     Create Azure management clients for common services.
 
     Args:
         credential: Azure credential object
         subscription_id (str): Azure subscription ID
+        transport: Optional shared azure.core transport so all clients reuse one
+            HTTP connection pool instead of opening their own sessions
 
     Returns:
         dict: Dictionary of Azure service clients
     """
+    classes = _mgmt_client_classes()
+    kwargs = {"transport": transport} if transport is not None else {}
     return {
-        "compute": ComputeManagementClient(credential, subscription_id),
-        "storage": StorageManagementClient(credential, subscription_id),
-        "resource": ResourceManagementClient(credential, subscription_id),
-        "network": NetworkManagementClient(credential, subscription_id),
-        "monitor": MonitorManagementClient(credential, subscription_id),
+        "compute": classes["ComputeManagementClient"](credential, subscription_id, **kwargs),
+        "storage": classes["StorageManagementClient"](credential, subscription_id, **kwargs),
+        "resource": classes["ResourceManagementClient"](credential, subscription_id, **kwargs),
+        "network": classes["NetworkManagementClient"](credential, subscription_id, **kwargs),
+        "monitor": classes["MonitorManagementClient"](credential, subscription_id, **kwargs),
     }
 
 
+class _LazyClient:
+    """Proxy that defers management-client construction to first use.
+
+    Building a mgmt client sets up its whole pipeline and policy chain; a
+    snippet that only touches compute_client should not pay for the other four.
+    Attribute access materializes the real client once and delegates thereafter.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return getattr(self._client, name)
+
+
+class _AzureContext:
+    """Credential, shared transport, and management clients reused across calls.
+
+    Each management client otherwise builds its own HTTP session, so every
+    azure_execute invocation paid five client constructions plus fresh TLS
+    handshakes. One context per process keeps a single pooled requests.Session
+    (and the credential's in-memory token cache) alive between tool calls.
+    """
+
+    def __init__(self):
+        import requests
+        from azure.core.pipeline.transport import RequestsTransport
+        from requests.adapters import HTTPAdapter
+
+        self.credential, self.subscription_id = get_azure_credential()
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self.transport = RequestsTransport(session=session, session_owner=False)
+        classes = _mgmt_client_classes()
+        self.clients = {
+            name: _LazyClient(
+                lambda cls=classes[class_name]: cls(self.credential, self.subscription_id, transport=self.transport)
+            )
+            for name, class_name in (
+                ("compute", "ComputeManagementClient"),
+                ("storage", "StorageManagementClient"),
+                ("resource", "ResourceManagementClient"),
+                ("network", "NetworkManagementClient"),
+                ("monitor", "MonitorManagementClient"),
+            )
+        }
+
+
+@lru_cache(maxsize=1)
+def _ns_template() -> Dict[str, Any]:
+    """Static portion of the exec namespace, built once and copied per call."""
+    template = {"json": json, "datetime": datetime, "timedelta": timedelta}
+    template.update(_mgmt_client_classes())
+    return template
+
+
+_azure_context = None
+_context_lock = threading.Lock()
+
+
+def get_azure_context() -> _AzureContext:
+    """Return the process-wide Azure context, building it on first use."""
+    global _azure_context
+    with _context_lock:
+        if _azure_context is None:
+            _azure_context = _AzureContext()
+        return _azure_context
+
+
 async def azure_execute(
     code: str,
 ) -> Dict[str, Any]:
     try:
-        # Get Azure credential and subscription ID
-        credential, subscription_id = get_azure_credential()
-
-        # Create Azure service clients
-        clients = get_azure_clients(credential, subscription_id)
-
-        # Build execution namespace
-        namespace = {
-            "json": json,
-            "datetime": datetime,
-            "timedelta": timedelta,
-            "credential": credential,
-            "subscription_id": subscription_id,
-            "compute_client": clients["compute"],
-            "storage_client": clients["storage"],
-            "resource_client": clients["resource"],
-            "network_client": clients["network"],
-            "monitor_client": clients["monitor"],
-            # Also provide direct access to management client classes
-            "ComputeManagementClient": ComputeManagementClient,
-            "StorageManagementClient": StorageManagementClient,
-            "ResourceManagementClient": ResourceManagementClient,
-            "NetworkManagementClient": NetworkManagementClient,
-            "MonitorManagementClient": MonitorManagementClient,
-        }
+        # Reuse the cached credential, transport, and clients
+        context = get_azure_context()
+        clients = context.clients
+
+        # Copy the prebuilt namespace and bind the per-call objects
+        namespace = _ns_template().copy()
+        namespace["credential"] = context.credential
+        namespace["subscription_id"] = context.subscription_id
+        namespace["compute_client"] = clients["compute"]
+        namespace["storage_client"] = clients["storage"]
+        namespace["resource_client"] = clients["resource"]
+        namespace["network_client"] = clients["network"]
+        namespace["monitor_client"] = clients["monitor"]
 
-        # Use asyncio.wait_for for timeout
-        output_capture = StringIO()
-        error_capture = StringIO()
         code = sanitize_python_code(code)
-        print(f"Executing Azure code: {code[:100]}...")
+        code_obj = compile_user_code(code, "<azure-exec>")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Executing Azure code: %.100s...", code)
 
-        with redirect_stdout(output_capture), redirect_stderr(error_capture):
-            # Execute with timeout
-            await asyncio.wait_for(
-                asyncio.get_event_loop().run_in_executor(None, lambda: exec(code, namespace)),
+        # Execute with timeout; output is captured per worker thread
+        # submit() skips the contextvars copy run_in_executor performs per call;
+        # the exec'd snippet never reads caller context variables
+        worker_info = {}
+        async with _azure_sem:
+            _, output, errors = await asyncio.wait_for(
+                asyncio.wrap_future(
+                    get_provider_executor().submit(
+                        run_captured_tracked, make_runner(code_obj, namespace), worker_info
+                    )
+                ),
                 timeout=30,
             )
 
-        output = output_capture.getvalue()
-        errors = error_capture.getvalue()
-
         return {"success": True, "output": output, "errors": errors if errors else None}
 
     except asyncio.TimeoutError:
+        # Reclaim the executor thread instead of leaking it mid-execution
+        interrupt_thread(worker_info.get("thread_id"))
         return {
             "success": False,
             "error": "Code execution timed out after 30 seconds",
             "error_type": "TimeoutError",
         }
     except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "error_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
-        }
+        return error_payload(e)
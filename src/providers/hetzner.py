@@ -1,29 +1,209 @@
 import asyncio
+import hashlib
 import json
+import logging
 import os
-import traceback
-from contextlib import redirect_stderr, redirect_stdout
+import threading
+import time
 from datetime import datetime, timedelta
-from io import StringIO
+from functools import lru_cache
 from typing import Any, Dict
 
-# Hetzner Cloud imports
-from hcloud import Client
-from hcloud.actions import BoundAction
-from hcloud.certificates import BoundCertificate
-from hcloud.datacenters import BoundDatacenter
-from hcloud.firewalls import BoundFirewall
-from hcloud.floating_ips import BoundFloatingIP
-from hcloud.images import BoundImage
-from hcloud.load_balancers import BoundLoadBalancer
-from hcloud.networks import BoundNetwork
-from hcloud.placement_groups import BoundPlacementGroup
-from hcloud.server_types import BoundServerType
-from hcloud.servers import BoundServer
-from hcloud.ssh_keys import BoundSSHKey
-from hcloud.volumes import BoundVolume
-
-from src.utils import sanitize_python_code
+from src.utils import (
+    compile_user_code,
+    error_payload,
+    get_provider_executor,
+    interrupt_thread,
+    make_runner,
+    run_captured_tracked,
+    sanitize_python_code,
+)
+
+log = logging.getLogger(__name__)
+
+# Cap concurrent executions so a burst of tool calls doesn't trigger
+# downstream throttling and retry cascades
+_hetzner_sem = asyncio.Semaphore(int(os.getenv("HCLOUD_MAX_CONC", "16")))
+
+# BLAKE2b(API token) -> shared Client, so repeat calls reuse live HTTPS
+# connections without keeping the raw secret around as a dict key
+_hcloud_clients: Dict[bytes, Any] = {}
+_clients_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _hcloud_symbols() -> Dict[str, Any]:
+    """Import the hcloud classes exposed to user code on first use.
+
+    The hcloud subpackages drag in requests/urllib3 and schema modules; loading
+    them lazily keeps server startup cheap when Hetzner tools are never called.
+    """
+    from hcloud import Client
+    from hcloud.actions import BoundAction
+    from hcloud.certificates import BoundCertificate
+    from hcloud.datacenters import BoundDatacenter
+    from hcloud.firewalls import BoundFirewall
+    from hcloud.floating_ips import BoundFloatingIP
+    from hcloud.images import BoundImage
+    from hcloud.load_balancers import BoundLoadBalancer
+    from hcloud.networks import BoundNetwork
+    from hcloud.placement_groups import BoundPlacementGroup
+    from hcloud.server_types import BoundServerType
+    from hcloud.servers import BoundServer
+    from hcloud.ssh_keys import BoundSSHKey
+    from hcloud.volumes import BoundVolume
+
+    return {
+        "Client": Client,
+        "BoundAction": BoundAction,
+        "BoundCertificate": BoundCertificate,
+        "BoundDatacenter": BoundDatacenter,
+        "BoundFirewall": BoundFirewall,
+        "BoundFloatingIP": BoundFloatingIP,
+        "BoundImage": BoundImage,
+        "BoundLoadBalancer": BoundLoadBalancer,
+        "BoundNetwork": BoundNetwork,
+        "BoundPlacementGroup": BoundPlacementGroup,
+        "BoundServerType": BoundServerType,
+        "BoundServer": BoundServer,
+        "BoundSSHKey": BoundSSHKey,
+        "BoundVolume": BoundVolume,
+    }
+
+
+@lru_cache(maxsize=1)
+def _ns_template() -> Dict[str, Any]:
+    """Static portion of the exec namespace, built once and copied per call."""
+    template = {"json": json, "datetime": datetime, "timedelta": timedelta}
+    template.update(_hcloud_symbols())
+    return template
+
+
+_SERVERS_TTL = int(os.getenv("HCLOUD_SERVERS_TTL", "60"))
+_CATALOG_TTL = int(os.getenv("HCLOUD_CATALOG_TTL", "600"))
+
+# Sustained rate / burst allowance matching the 3600 req/hour account cap
+_API_RATE = float(os.getenv("HCLOUD_API_RATE", "1.0"))
+_API_BURST = int(os.getenv("HCLOUD_API_BURST", "50"))
+
+
+class _TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is free.
+
+    Shapes egress to the account quota so bursts queue client-side instead of
+    collecting 429s (and eventually an API ban) upstream. Callers run on
+    provider-executor threads, so blocking in acquire() is acceptable.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            if wait > 5:
+                log.warning("Hetzner API rate limit saturated; delaying request %.1fs", wait)
+            time.sleep(wait)
+
+
+class _CachedResource:
+    """TTL cache over a bound-resource client's get_all() calls.
+
+    Concurrent misses for the same arguments coalesce into one upstream request
+    (the lock is held across the fetch); create/delete/update calls pass
+    through and invalidate the cache so stale lists are not served after a
+    mutation.
+    """
+
+    _MUTATORS = ("create", "delete", "update")
+
+    def __init__(self, resource, ttl: int):
+        self._resource = resource
+        self._ttl = ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get_all(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and hit[1] > time.monotonic():
+                return hit[0]
+            value = self._resource.get_all(*args, **kwargs)
+            self._cache[key] = (value, time.monotonic() + self._ttl)
+            return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __getattr__(self, name):
+        attr = getattr(self._resource, name)
+        if name in self._MUTATORS and callable(attr):
+
+            def wrapped(*args, **kwargs):
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self.invalidate()
+
+            return wrapped
+        return attr
+
+
+class CachedHCloudClient:
+    """hcloud Client wrapper that TTL-caches the hot list endpoints.
+
+    The Hetzner API is hard-capped at 3600 requests/hour, which bursty
+    automation burns through quickly. Server lists get a short TTL since they
+    change; the server-type/image/datacenter catalogs barely change and get a
+    long one. Every other attribute passes through to the raw client.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.servers = _CachedResource(client.servers, _SERVERS_TTL)
+        self.server_types = _CachedResource(client.server_types, _CATALOG_TTL)
+        self.images = _CachedResource(client.images, _CATALOG_TTL)
+        self.datacenters = _CachedResource(client.datacenters, _CATALOG_TTL)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def _build_client(api_token: str):
+    """Construct an hcloud Client backed by a sized connection pool."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    client = _hcloud_symbols()["Client"](token=api_token)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=3)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    # Every outbound API call takes a token first, shaping traffic to the quota
+    bucket = _TokenBucket(_API_RATE, _API_BURST)
+    raw_send = session.send
+
+    def send(request, **kwargs):
+        bucket.acquire()
+        return raw_send(request, **kwargs)
+
+    session.send = send
+    client._requests_session = session
+    return client
 
 
 def get_hetzner_client(hcloud_api_token=None):
@@ -44,13 +224,17 @@ def get_hetzner_client(hcloud_api_token=None):
     if not api_token:
         raise ValueError("Hetzner Cloud API token is required. Set HCLOUD_API_TOKEN environment variable.")
 
-    # Log the credential source we're using
-    if hcloud_api_token:
-        print("Creating Hetzner Cloud client with provided API token")
-    else:
-        print("Creating Hetzner Cloud client with environment variable token")
-
-    return Client(token=api_token)
+    token_hash = hashlib.blake2b(api_token.encode(), digest_size=16).digest()
+    with _clients_lock:
+        client = _hcloud_clients.get(token_hash)
+        if client is None:
+            # Log the credential source we're using
+            if hcloud_api_token:
+                log.debug("Creating Hetzner Cloud client with provided API token")
+            else:
+                log.debug("Creating Hetzner Cloud client with environment variable token")
+            client = _hcloud_clients[token_hash] = CachedHCloudClient(_build_client(api_token))
+    return client
 
 
 async def hetzner_execute(
@@ -60,57 +244,38 @@ async def hetzner_execute(
         # Get Hetzner Cloud client
         client = get_hetzner_client(hcloud_api_token=os.getenv("HCLOUD_API_TOKEN"))
 
-        # Build execution namespace
-        namespace = {
-            "json": json,
-            "datetime": datetime,
-            "timedelta": timedelta,
-            "client": client,
-            # Provide direct access to hcloud classes for advanced usage
-            "Client": Client,
-            "BoundAction": BoundAction,
-            "BoundCertificate": BoundCertificate,
-            "BoundDatacenter": BoundDatacenter,
-            "BoundFirewall": BoundFirewall,
-            "BoundFloatingIP": BoundFloatingIP,
-            "BoundImage": BoundImage,
-            "BoundLoadBalancer": BoundLoadBalancer,
-            "BoundNetwork": BoundNetwork,
-            "BoundPlacementGroup": BoundPlacementGroup,
-            "BoundServerType": BoundServerType,
-            "BoundServer": BoundServer,
-            "BoundSSHKey": BoundSSHKey,
-            "BoundVolume": BoundVolume,
-        }
+        # Copy the prebuilt namespace and bind the per-call client
+        namespace = _ns_template().copy()
+        namespace["client"] = client
 
-        # Use asyncio.wait_for for timeout
-        output_capture = StringIO()
-        error_capture = StringIO()
         code = sanitize_python_code(code)
-        print(f"Executing Hetzner Cloud code: {code[:100]}...")
+        code_obj = compile_user_code(code, "<hetzner-exec>")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Executing Hetzner Cloud code: %.100s...", code)
 
-        with redirect_stdout(output_capture), redirect_stderr(error_capture):
-            # Execute with timeout
-            await asyncio.wait_for(
-                asyncio.get_event_loop().run_in_executor(None, lambda: exec(code, namespace)),
+        # Execute with timeout; output is captured per worker thread
+        # submit() skips the contextvars copy run_in_executor performs per call;
+        # the exec'd snippet never reads caller context variables
+        worker_info = {}
+        async with _hetzner_sem:
+            _, output, errors = await asyncio.wait_for(
+                asyncio.wrap_future(
+                    get_provider_executor().submit(
+                        run_captured_tracked, make_runner(code_obj, namespace), worker_info
+                    )
+                ),
                 timeout=30,
             )
 
-        output = output_capture.getvalue()
-        errors = error_capture.getvalue()
-
         return {"success": True, "output": output, "errors": errors if errors else None}
 
     except asyncio.TimeoutError:
+        # Reclaim the executor thread instead of leaking it mid-execution
+        interrupt_thread(worker_info.get("thread_id"))
         return {
             "success": False,
             "error": "Code execution timed out after 30 seconds",
             "error_type": "TimeoutError",
         }
     except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "error_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
-        }
+        return error_payload(e)
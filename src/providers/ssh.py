@@ -1,6 +1,17 @@
+import asyncio
+import base64
+import hashlib
+import logging
 import os
+import re
+import select
+import socket
+import struct
+import threading
+import time
 import traceback
-from datetime import datetime
+from collections import defaultdict
+from contextlib import asynccontextmanager
 from typing import Any, Dict
 
 # SSH client library
@@ -8,6 +19,181 @@ import paramiko
 from paramiko import AutoAddPolicy, ECDSAKey, Ed25519Key, RSAKey, SSHClient
 from paramiko.ssh_exception import AuthenticationException, NoValidConnectionsError, SSHException
 
+from src.utils import get_provider_executor
+
+log = logging.getLogger(__name__)
+
+_POOL_MAX_IDLE = int(os.getenv("SSH_POOL_IDLE", "4"))
+
+# Dangerous-command patterns collapsed into one precompiled, case-insensitive
+# regex so sanitization is a single C-level scan instead of a Python loop over
+# a lowercased copy of the command.
+_DANGEROUS_RE = re.compile(
+    r"(?i)(?:rm\s+-rf\s+/|mkfs|dd\s+if=|format|:\(\)\s*\{\s*:\|\s*:&\s*\};:|chmod\s+777|chown\s+root)"
+)
+
+
+class _SSHPool:
+    """Pool of live, authenticated SSH connections keyed by host and identity.
+
+    Every command previously paid a full TCP + KEX + userauth handshake and
+    tore the connection down in the finally block; for bursts of commands
+    against the same host the handshake dominates wall time. Connections are
+    parked here after use, validated cheaply on borrow, and rebuilt when dead.
+    Only provider-executor threads touch the pool, so a plain lock suffices.
+    """
+
+    def __init__(self, max_idle: int = _POOL_MAX_IDLE):
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self._max_idle = max_idle
+
+    @staticmethod
+    def key(hostname, port, username, password, private_key, private_key_path, use_ssh_agent, compress=False):
+        # Fingerprint the auth material instead of keying on raw secrets;
+        # compression is a per-connection property, so it splits the key too
+        auth = hashlib.blake2b(
+            repr((password, private_key, private_key_path, use_ssh_agent, compress)).encode(), digest_size=16
+        ).hexdigest()
+        return (hostname, port, username, auth)
+
+    def acquire(self, key):
+        """Return a live pooled client for key, or None if none is parked."""
+        while True:
+            with self._lock:
+                if not self._idle[key]:
+                    return None
+                client = self._idle[key].pop()
+            transport = client.get_transport()
+            if transport is not None and transport.is_active():
+                try:
+                    transport.send_ignore()
+                    return client
+                except Exception:
+                    pass
+            # Dead connection: drop it and try the next parked one
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def release(self, key, client):
+        """Park a healthy client for reuse, closing it if the shelf is full."""
+        transport = client.get_transport()
+        if transport is not None and transport.is_active():
+            with self._lock:
+                if len(self._idle[key]) < self._max_idle:
+                    self._idle[key].append(client)
+                    return
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+_ssh_pool = _SSHPool()
+
+# BLAKE2b(key content) -> parsed paramiko.PKey
+_key_cache: Dict[bytes, paramiko.PKey] = {}
+_key_cache_lock = threading.Lock()
+
+_OUTPUT_CAP = int(os.getenv("SSH_OUTPUT_CAP", str(8 * 1024 * 1024)))
+
+_DNS_TTL = int(os.getenv("SSH_DNS_TTL", "60"))
+
+# hostname -> (address, expires_at); connect() otherwise pays a blocking
+# getaddrinfo per call, which adds 5-50 ms and dominates wide fan-outs
+_dns_cache: Dict[str, tuple] = {}
+_dns_lock = threading.Lock()
+
+
+def _resolve_host(hostname: str) -> str:
+    """Resolve hostname to an address, caching the answer for a short TTL.
+
+    Returns the hostname unchanged when resolution fails so connect() can
+    surface its own, more descriptive error.
+    """
+    with _dns_lock:
+        hit = _dns_cache.get(hostname)
+        if hit is not None and hit[1] > time.monotonic():
+            return hit[0]
+    try:
+        infos = socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+    except OSError:
+        return hostname
+    address = infos[0][4][0]
+    with _dns_lock:
+        _dns_cache[hostname] = (address, time.monotonic() + _DNS_TTL)
+    return address
+
+
+def _evict_dns(hostname: str) -> None:
+    with _dns_lock:
+        _dns_cache.pop(hostname, None)
+
+
+# Exception class -> error message template for ssh_execute's failure path;
+# isinstance order matters (AuthenticationException is an SSHException, and
+# TimeoutError must win over its OSError parent)
+_ERR_MAP = (
+    (AuthenticationException, "SSH authentication failed: {}"),
+    (SSHException, "SSH connection error: {}"),
+    (TimeoutError, "{}"),
+)
+
+
+def _drain_channel(channel, timeout):
+    """Drain stdout/stderr while the command runs, bounding memory and time.
+
+    recv_exit_status() followed by read() serializes the download behind the
+    exit-code wait and buffers unbounded output. This loop interleaves draining
+    both streams with the exit check, caps each buffer at SSH_OUTPUT_CAP
+    (default 8 MiB), and enforces the timeout itself since the channel is
+    switched to non-blocking mode.
+
+    Returns (stdout_bytes, stderr_bytes, exit_code, stdout_truncated,
+    stderr_truncated).
+    """
+    out = bytearray()
+    err = bytearray()
+    out_truncated = err_truncated = False
+    deadline = time.monotonic() + timeout if timeout else None
+    channel.settimeout(0.0)
+
+    def append(buffer, chunk, truncated):
+        if truncated:
+            return True
+        space = _OUTPUT_CAP - len(buffer)
+        buffer += chunk[:space]
+        return len(chunk) > space
+
+    while True:
+        progressed = False
+        if channel.recv_ready():
+            out_truncated = append(out, channel.recv(65536), out_truncated)
+            progressed = True
+        if channel.recv_stderr_ready():
+            err_truncated = append(err, channel.recv_stderr(65536), err_truncated)
+            progressed = True
+        if not progressed:
+            if channel.exit_status_ready():
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                channel.close()
+                raise TimeoutError(f"SSH command timed out after {timeout} seconds")
+            select.select([channel], [], [], 0.1)
+
+    exit_code = channel.recv_exit_status()
+
+    # Final drain: bytes queued by the transport between the last ready-checks
+    # and the exit-status check would otherwise be dropped
+    while channel.recv_ready():
+        out_truncated = append(out, channel.recv(65536), out_truncated)
+    while channel.recv_stderr_ready():
+        err_truncated = append(err, channel.recv_stderr(65536), err_truncated)
+
+    return bytes(out), bytes(err), exit_code, out_truncated, err_truncated
+
 
 def get_ssh_client(
     hostname: str,
@@ -18,6 +204,7 @@ def get_ssh_client(
     port: int = 22,
     timeout: int = 30,
     use_ssh_agent: bool = True,
+    compress: bool = False,
 ) -> SSHClient:
     """
     Create an SSH client connection with secure credential handling.
@@ -34,6 +221,8 @@ def get_ssh_client(
         port (int, optional): SSH port (default: 22)
         timeout (int, optional): Connection timeout in seconds (default: 30)
         use_ssh_agent (bool, optional): Whether to use SSH agent for key auth (default: True)
+        compress (bool, optional): Enable zlib compression; only worthwhile on
+            bandwidth-limited WAN links, costs CPU on fast networks (default: False)
 
     Returns:
         paramiko.SSHClient: Connected SSH client
@@ -56,7 +245,7 @@ def get_ssh_client(
     if not has_password and not has_private_key and not use_ssh_agent:
         raise ValueError("At least one authentication method is required: password, private key, or SSH agent")
 
-    print(f"Creating SSH connection to {username}@{hostname}:{port}")
+    log.debug("Creating SSH connection to %s@%s:%s", username, hostname, port)
 
     # Create SSH client with security settings
     client = SSHClient()
@@ -71,9 +260,10 @@ def get_ssh_client(
         if private_key or private_key_path:
             pkey = _load_private_key(private_key, private_key_path)
 
-        # Attempt connection with authentication
+        # Attempt connection with authentication (pre-resolved address; a
+        # stale cached record is evicted below if the connect fails)
         client.connect(
-            hostname=hostname,
+            hostname=_resolve_host(hostname),
             port=port,
             username=username,
             password=password,
@@ -81,26 +271,69 @@ def get_ssh_client(
             timeout=timeout,
             allow_agent=use_ssh_agent,
             look_for_keys=True,  # Look for keys in default locations
-            compress=True,  # Enable compression for better performance
+            compress=compress,  # Opt-in: zlib only pays off on slow WAN links
         )
 
-        print(f"✅ SSH connection established to {hostname}")
+        # Keepalives let pooled connections survive idle gaps and NAT timeouts
+        client.get_transport().set_keepalive(30)
+
+        log.debug("SSH connection established to %s", hostname)
         return client
 
     except AuthenticationException as e:
-        print(f"❌ SSH authentication failed for {username}@{hostname}: {e}")
+        log.debug("SSH authentication failed for %s@%s: %s", username, hostname, e)
         client.close()
         raise
     except (SSHException, NoValidConnectionsError) as e:
-        print(f"❌ SSH connection failed to {hostname}: {e}")
+        log.debug("SSH connection failed to %s: %s", hostname, e)
+        _evict_dns(hostname)
         client.close()
         raise
     except Exception as e:
-        print(f"❌ Unexpected SSH error: {e}")
+        log.debug("Unexpected SSH error: %s", e)
+        _evict_dns(hostname)
         client.close()
         raise
 
 
+def _detect_key_class(key_content: str):
+    """Pick the right PKey class from the key header instead of trial parsing.
+
+    Trying RSA/Ed25519/ECDSA in sequence fully parses (and throws through) each
+    wrong class first. Legacy PEM headers name the algorithm directly; for the
+    OpenSSH container format, the algorithm string sits at the front of the
+    embedded public-key blob. Returns None when the format is unrecognized so
+    the caller can fall back to trial parsing.
+    """
+    if "BEGIN RSA PRIVATE KEY" in key_content:
+        return RSAKey
+    if "BEGIN EC PRIVATE KEY" in key_content:
+        return ECDSAKey
+    if "BEGIN OPENSSH PRIVATE KEY" in key_content:
+        try:
+            body = "".join(line for line in key_content.splitlines() if not line.startswith("-----"))
+            blob = base64.b64decode(body)
+            # openssh-key-v1 layout: NUL-terminated magic, then length-prefixed
+            # ciphername, kdfname, kdfoptions, a key count, and the first
+            # public-key blob whose leading string names the algorithm
+            offset = len(b"openssh-key-v1\x00")
+            for _ in range(3):
+                (length,) = struct.unpack_from(">I", blob, offset)
+                offset += 4 + length
+            offset += 4 + 4  # key count + public-key blob length
+            (alg_len,) = struct.unpack_from(">I", blob, offset)
+            algorithm = blob[offset + 4 : offset + 4 + alg_len]
+            if algorithm == b"ssh-ed25519":
+                return Ed25519Key
+            if algorithm.startswith(b"ecdsa-sha2-"):
+                return ECDSAKey
+            if algorithm in (b"ssh-rsa", b"rsa-sha2-256", b"rsa-sha2-512"):
+                return RSAKey
+        except Exception:
+            pass
+    return None
+
+
 def _load_private_key(private_key_content: str = None, private_key_path: str = None) -> paramiko.PKey:
     """
     Load a private key from content string or file path.
@@ -123,20 +356,31 @@ def _load_private_key(private_key_content: str = None, private_key_path: str = N
 
     if private_key_content:
         key_content = private_key_content
-        print("Loading private key from provided content")
+        log.debug("Loading private key from provided content")
     elif private_key_path:
         if not os.path.exists(private_key_path):
             raise FileNotFoundError(f"Private key file not found: {private_key_path}")
 
         with open(private_key_path, "r") as key_file:
             key_content = key_file.read()
-        print(f"Loading private key from file: {private_key_path}")
+        log.debug("Loading private key from file: %s", private_key_path)
     else:
         raise ValueError("Either private_key_content or private_key_path must be provided")
 
-    # Try different supported key types (RSA, Ed25519, ECDSA)
+    # Key parsing does real asymmetric-crypto decode work; the same deploy key
+    # is typically reused across many hosts, so cache parsed keys by a hash of
+    # their content rather than re-decoding per connection.
+    cache_key = hashlib.blake2b(key_content.encode(), digest_size=16).digest()
+    with _key_cache_lock:
+        cached = _key_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Dispatch on the key header when possible; otherwise try each supported
+    # type (RSA, Ed25519, ECDSA) in turn.
     # Note: DSS/DSA keys are no longer supported for security reasons
-    key_classes = [RSAKey, Ed25519Key, ECDSAKey]
+    detected = _detect_key_class(key_content)
+    key_classes = [detected] if detected else [RSAKey, Ed25519Key, ECDSAKey]
 
     # Check if this might be a DSS key and provide helpful error message
     if "BEGIN DSA PRIVATE KEY" in key_content or "ssh-dss" in key_content:
@@ -152,12 +396,15 @@ def _load_private_key(private_key_content: str = None, private_key_path: str = N
                 from io import StringIO
 
                 key_file_obj = StringIO(key_content)
-                return key_class.from_private_key(key_file_obj)
+                pkey = key_class.from_private_key(key_file_obj)
             else:
                 # Load from file path
-                return key_class.from_private_key_file(private_key_path)
+                pkey = key_class.from_private_key_file(private_key_path)
         except Exception:
             continue
+        with _key_cache_lock:
+            _key_cache[cache_key] = pkey
+        return pkey
 
     raise ValueError(
         "Unable to load private key - unsupported format or invalid key. "
@@ -177,20 +424,82 @@ async def ssh_execute(
     timeout: int = 30,
     use_ssh_agent: bool = True,
     sanitize_command: bool = True,
+    compress: bool = False,
 ) -> Dict[str, Any]:
 
-    start_time = datetime.now()
-    ssh_client = None
+    start = time.monotonic()
 
     try:
         # Basic command sanitization if enabled
         if sanitize_command:
             command = _sanitize_command(command)
 
-        print(f"Executing SSH command on {hostname}: {command[:100]}...")
+        log.debug("Executing SSH command on %s: %.100s...", hostname, command)
+
+        # Paramiko's connect/exec/read calls all block; running them inline
+        # would stall the event loop for the whole SSH round trip. Hand the
+        # blocking work to the provider executor and await its future.
+        output, error_output, exit_code = await asyncio.wrap_future(
+            get_provider_executor().submit(
+                _run_ssh_command,
+                hostname,
+                command,
+                username,
+                password,
+                private_key,
+                private_key_path,
+                port,
+                timeout,
+                use_ssh_agent,
+                compress,
+            )
+        )
 
-        # Establish SSH connection
-        ssh_client = get_ssh_client(
+        return {
+            "success": True,
+            "output": output,
+            "error_output": error_output if error_output else None,
+            "exit_code": exit_code,
+            "execution_time": time.monotonic() - start,
+            "hostname": hostname,
+            "command": command,
+        }
+
+    except Exception as e:
+        response = {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "execution_time": time.monotonic() - start,
+            "hostname": hostname,
+        }
+        for exc_class, template in _ERR_MAP:
+            if isinstance(e, exc_class):
+                response["error"] = template.format(e)
+                break
+        else:
+            # format_exc walks the stack and reads source files; only pay for
+            # it on genuinely unexpected failures
+            response["traceback"] = traceback.format_exc()
+        return response
+
+
+def _run_ssh_command(
+    hostname: str,
+    command: str,
+    username: str,
+    password: str,
+    private_key: str,
+    private_key_path: str,
+    port: int,
+    timeout: int,
+    use_ssh_agent: bool,
+    compress: bool = False,
+):
+    """Connect, run the command, and collect output. Blocking; executor-only."""
+
+    def _connect():
+        return get_ssh_client(
             hostname=hostname,
             username=username,
             password=password,
@@ -199,74 +508,249 @@ async def ssh_execute(
             port=port,
             timeout=timeout,
             use_ssh_agent=use_ssh_agent,
+            compress=compress,
         )
 
-        # Execute command with timeout
-        stdin, stdout, stderr = ssh_client.exec_command(command, timeout=timeout)
+    pool_key = _SSHPool.key(
+        hostname, port, username, password, private_key, private_key_path, use_ssh_agent, compress
+    )
+    ssh_client = _ssh_pool.acquire(pool_key)
+    pooled = ssh_client is not None
+    if not pooled:
+        ssh_client = _connect()
 
-        # Wait for command completion with timeout
-        exit_code = stdout.channel.recv_exit_status()
+    try:
+        try:
+            streams = _open_channel(ssh_client, command, timeout)
+        except TimeoutError:
+            raise
+        except (SSHException, EOFError, OSError):
+            if not pooled:
+                raise
+            # The parked transport died on channel open; retry once fresh.
+            # Only the open is retried — once the command may have started,
+            # re-running it could repeat its side effects.
+            try:
+                ssh_client.close()
+            except Exception:
+                pass
+            ssh_client = _connect()
+            streams = _open_channel(ssh_client, command, timeout)
+        return _collect_output(streams, timeout)
 
-        # Read output and errors
-        output = stdout.read().decode("utf-8", errors="replace")
-        error_output = stderr.read().decode("utf-8", errors="replace")
+    finally:
+        # Park the connection for reuse instead of tearing it down
+        _ssh_pool.release(pool_key, ssh_client)
 
-        execution_time = (datetime.now() - start_time).total_seconds()
 
-        # Close streams
-        stdin.close()
-        stdout.close()
-        stderr.close()
+def _open_channel(ssh_client: SSHClient, command: str, timeout: int):
+    """Open a channel and start the command. Blocking; executor-only."""
+    return ssh_client.exec_command(command, timeout=timeout)
 
-        return {
-            "success": True,
-            "output": output,
-            "error_output": error_output if error_output else None,
-            "exit_code": exit_code,
-            "execution_time": execution_time,
-            "hostname": hostname,
-            "command": command,
-        }
 
-    except AuthenticationException as e:
-        execution_time = (datetime.now() - start_time).total_seconds()
-        return {
-            "success": False,
-            "error": f"SSH authentication failed: {str(e)}",
-            "error_type": "AuthenticationException",
-            "execution_time": execution_time,
-            "hostname": hostname,
-        }
+def _collect_output(streams, timeout: int):
+    """Drain a started command's streams and return (output, errors, exit_code)."""
+    stdin, stdout, stderr = streams
 
-    except SSHException as e:
-        execution_time = (datetime.now() - start_time).total_seconds()
-        return {
-            "success": False,
-            "error": f"SSH connection error: {str(e)}",
-            "error_type": "SSHException",
-            "execution_time": execution_time,
-            "hostname": hostname,
-        }
+    # Drain output while the command runs instead of blocking on
+    # recv_exit_status() and then buffering everything with read()
+    out_bytes, err_bytes, exit_code, out_truncated, err_truncated = _drain_channel(stdout.channel, timeout)
 
-    except Exception as e:
-        execution_time = (datetime.now() - start_time).total_seconds()
-        return {
-            "success": False,
-            "error": str(e),
-            "error_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
-            "execution_time": execution_time,
-            "hostname": hostname,
-        }
+    output = out_bytes.decode("utf-8", errors="replace")
+    error_output = err_bytes.decode("utf-8", errors="replace")
+    if out_truncated:
+        output += f"\n[...output truncated at {_OUTPUT_CAP} bytes...]\n"
+    if err_truncated:
+        error_output += f"\n[...output truncated at {_OUTPUT_CAP} bytes...]\n"
 
-    finally:
-        # Always clean up SSH connection
-        if ssh_client:
+    # Close streams
+    stdin.close()
+    stdout.close()
+    stderr.close()
+
+    return output, error_output, exit_code
+
+
+class SSHSession:
+    """Runs several commands over one SSH connection (ControlMaster pattern).
+
+    Each run() only opens a new channel (~1 RTT) over the session's existing
+    transport, amortizing the TCP + KEX + userauth handshake across every
+    command. The connection is borrowed from the shared pool on first use and
+    parked back on close(); obtain a session via ssh_session().
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        username: str = "root",
+        password: str = None,
+        private_key: str = None,
+        private_key_path: str = None,
+        port: int = 22,
+        timeout: int = 30,
+        use_ssh_agent: bool = True,
+        compress: bool = False,
+    ):
+        self._params = dict(
+            hostname=hostname,
+            username=username,
+            password=password,
+            private_key=private_key,
+            private_key_path=private_key_path,
+            port=port,
+            timeout=timeout,
+            use_ssh_agent=use_ssh_agent,
+            compress=compress,
+        )
+        self._pool_key = _SSHPool.key(
+            hostname, port, username, password, private_key, private_key_path, use_ssh_agent, compress
+        )
+        self._client = None
+
+    def _run_blocking(self, command: str, timeout: int):
+        pooled = False
+        if self._client is None:
+            self._client = _ssh_pool.acquire(self._pool_key)
+            pooled = self._client is not None
+            if not pooled:
+                self._client = get_ssh_client(**self._params)
+        else:
+            # A client surviving from an earlier run() came from the pool once
+            # and may have gone stale while the session sat idle
+            pooled = True
+        try:
+            streams = _open_channel(self._client, command, timeout)
+        except TimeoutError:
+            raise
+        except (SSHException, EOFError, OSError):
+            if not pooled:
+                raise
+            # The borrowed transport died on channel open; retry once fresh.
+            # Only the open is retried — once the command may have started,
+            # re-running it could repeat its side effects.
             try:
-                ssh_client.close()
-                print(f"SSH connection to {hostname} closed")
-            except Exception as e:
-                print(f"Warning: Error closing SSH connection: {e}")
+                self._client.close()
+            except Exception:
+                pass
+            self._client = get_ssh_client(**self._params)
+            streams = _open_channel(self._client, command, timeout)
+        return _collect_output(streams, timeout)
+
+    async def run(self, command: str, timeout: int = 30, sanitize_command: bool = True) -> Dict[str, Any]:
+        """Execute one command on this session; same response shape as ssh_execute."""
+        start = time.monotonic()
+        hostname = self._params["hostname"]
+
+        try:
+            if sanitize_command:
+                command = _sanitize_command(command)
+
+            output, error_output, exit_code = await asyncio.wrap_future(
+                get_provider_executor().submit(self._run_blocking, command, timeout)
+            )
+
+            return {
+                "success": True,
+                "output": output,
+                "error_output": error_output if error_output else None,
+                "exit_code": exit_code,
+                "execution_time": time.monotonic() - start,
+                "hostname": hostname,
+                "command": command,
+            }
+
+        except Exception as e:
+            response = {
+                "success": False,
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "execution_time": time.monotonic() - start,
+                "hostname": hostname,
+            }
+            for exc_class, template in _ERR_MAP:
+                if isinstance(e, exc_class):
+                    response["error"] = template.format(e)
+                    break
+            else:
+                response["traceback"] = traceback.format_exc()
+            return response
+
+    async def close(self) -> None:
+        """Park the session's connection back in the pool."""
+        if self._client is not None:
+            _ssh_pool.release(self._pool_key, self._client)
+            self._client = None
+
+
+@asynccontextmanager
+async def ssh_session(
+    hostname: str,
+    username: str = "root",
+    password: str = None,
+    private_key: str = None,
+    private_key_path: str = None,
+    port: int = 22,
+    timeout: int = 30,
+    use_ssh_agent: bool = True,
+    compress: bool = False,
+):
+    """Async context manager vending an SSHSession for multi-command workflows.
+
+    Example:
+        async with ssh_session("10.0.0.5", username="deploy") as session:
+            await session.run("systemctl stop app")
+            await session.run("tar xzf /tmp/release.tgz -C /srv/app")
+            await session.run("systemctl start app")
+    """
+    session = SSHSession(
+        hostname=hostname,
+        username=username,
+        password=password,
+        private_key=private_key,
+        private_key_path=private_key_path,
+        port=port,
+        timeout=timeout,
+        use_ssh_agent=use_ssh_agent,
+        compress=compress,
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def ssh_execute_many(
+    hosts: list,
+    command: str,
+    max_concurrency: int = 50,
+    **common,
+) -> list:
+    """Run one command across many hosts concurrently, bounded by a semaphore.
+
+    Calling ssh_execute in a loop serializes across hosts; gathering unbounded
+    tasks instead trips firewalls and explodes thread usage. This fans out up
+    to max_concurrency executions at a time and returns results in input order.
+
+    Args:
+        hosts (list[dict]): Per-host keyword overrides for ssh_execute; each
+            entry needs at least a "hostname" and may override credentials,
+            port, etc.
+        command (str): The shell command to run on every host
+        max_concurrency (int, optional): Maximum simultaneous executions (default: 50)
+        **common: Keyword arguments applied to every host (e.g. username,
+            private_key_path), overridden by per-host entries
+
+    Returns:
+        list[dict]: One ssh_execute response per host, in input order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def one(host_spec):
+        async with semaphore:
+            return await ssh_execute(command=command, **{**common, **host_spec})
+
+    return await asyncio.gather(*(one(host_spec) for host_spec in hosts))
 
 
 def _sanitize_command(command: str) -> str:
@@ -291,20 +775,9 @@ def _sanitize_command(command: str) -> str:
     # Remove leading/trailing whitespace
     command = command.strip()
 
-    # Basic checks for potentially dangerous patterns
-    dangerous_patterns = [
-        "rm -rf /",
-        "mkfs",
-        "dd if=",
-        "format",
-        ":(){ :|:& };:",  # Fork bomb
-        "chmod 777",
-        "chown root",
-    ]
-
-    command_lower = command.lower()
-    for pattern in dangerous_patterns:
-        if pattern in command_lower:
-            raise ValueError(f"Command contains potentially dangerous pattern: {pattern}")
+    # Basic check for potentially dangerous patterns (single regex pass)
+    match = _DANGEROUS_RE.search(command)
+    if match:
+        raise ValueError(f"Command contains potentially dangerous pattern: {match.group(0)}")
 
     return command
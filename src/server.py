@@ -1,45 +1,82 @@
 # server.py
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Any, Dict
 
+import orjson
 from azure.mgmt.resource import ResourceManagementClient
 from fastmcp import FastMCP
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import Response
 
 # Import cloud providers
 from providers.aws import boto3_execute, get_aws_session
 from providers.azure import azure_execute, get_azure_credential
 from providers.hetzner import get_hetzner_client, hetzner_execute
-from providers.ssh import ssh_execute
+from providers.ssh import ssh_execute, ssh_execute_many
+from providers import warm_providers
+
+try:
+    # uvloop is a drop-in replacement for the default event loop that is
+    # noticeably faster for the many small async handoffs an MCP server does.
+    import uvloop
+
+    uvloop.install()
+except ImportError:
+    pass
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(name)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger("multi_cloud_devops")
 
 mcp = FastMCP("Multi-Cloud DevOps 🚀")
 
 
+# Everything in the health payload except the timestamp is invariant, so the
+# serialized halves are computed once and only the timestamp is spliced in
+_HEALTH_TEMPLATE = {
+    "status": "healthy",
+    "timestamp": "",
+    "server_name": "multi-cloud-devops",
+    "version": "2.0.0",
+    "uptime": "running",
+    "tools_available": [
+        "boto3_execute",
+        "azure_execute",
+        "hetzner_execute",
+        "ssh_execute_wrapper",
+        "ssh_execute_many_wrapper",
+    ],
+    "resources_available": ["health://status", "server://info"],
+    "supported_clouds": ["AWS", "Azure", "Hetzner Cloud"],
+    "supported_protocols": ["SSH"],
+}
+_HEALTH_HEAD, _HEALTH_TAIL = orjson.dumps(_HEALTH_TEMPLATE).decode().split('""', 1)
+
+
 @mcp.resource("health://status")
 def health_status() -> str:
     """Get the current health status of the server"""
-    health_data = {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "server_name": "multi-cloud-devops",
-        "version": "2.0.0",
-        "uptime": "running",
-        "tools_available": ["boto3_execute", "azure_execute", "hetzner_execute", "ssh_execute_wrapper"],
-        "resources_available": ["health://status", "server://info"],
-        "supported_clouds": ["AWS", "Azure", "Hetzner Cloud"],
-        "supported_protocols": ["SSH"],
-    }
-    return str(health_data)
+    return _HEALTH_HEAD + '"' + datetime.now().isoformat() + '"' + _HEALTH_TAIL
+
+
+# Load balancers poll /health every few seconds and the body never changes;
+# serialize it once instead of running dict -> json -> bytes per probe
+_HEALTH_BODY = orjson.dumps(
+    {"status": "alive", "clouds": ["AWS", "Azure", "Hetzner Cloud"], "protocols": ["SSH"], "version": "2.0.0"}
+)
 
 
 @mcp.custom_route("/health", methods=["GET"])
-async def health_check(request: Request) -> JSONResponse:
+async def health_check(request: Request) -> Response:
     """Basic health check that the server is running."""
-    return JSONResponse(
-        {"status": "alive", "clouds": ["AWS", "Azure", "Hetzner Cloud"], "protocols": ["SSH"], "version": "2.0.0"},
-        status_code=200,
-    )
+    return Response(_HEALTH_BODY, status_code=200, media_type="application/json")
 
 
 # Register the modified tool functions with FastMCP
@@ -250,6 +287,7 @@ async def ssh_execute_wrapper(
     port: int = 22,
     timeout: int = 30,
     use_ssh_agent: bool = True,
+    compress: bool = False,
 ) -> Dict[str, Any]:
     """Execute commands on remote servers via SSH with temporal credentials
 
@@ -318,6 +356,8 @@ async def ssh_execute_wrapper(
         port (int, optional): SSH port number (default: 22)
         timeout (int, optional): Command execution timeout in seconds (default: 30)
         use_ssh_agent (bool, optional): Use SSH agent for key authentication (default: True)
+        compress (bool, optional): Enable SSH compression; useful on slow WAN
+            links, wasted CPU on fast networks (default: False)
 
     Returns:
         Dict[str, Any]: Response containing:
@@ -342,46 +382,124 @@ async def ssh_execute_wrapper(
         port=port,
         timeout=timeout,
         use_ssh_agent=use_ssh_agent,
+        compress=compress,
+    )
+
+
+@mcp.tool
+async def ssh_execute_many_wrapper(
+    hosts: list,
+    command: str,
+    max_concurrency: int = 50,
+    username: str = "root",
+    password: str = None,
+    private_key: str = None,
+    private_key_path: str = None,
+    port: int = 22,
+    timeout: int = 30,
+    use_ssh_agent: bool = True,
+    compress: bool = False,
+) -> list:
+    """Execute one command across many servers via SSH, concurrently
+
+    Fans the command out to every host with a bounded concurrency limit and
+    returns one result per host, in the same order as the input list. Each
+    host entry is a dict with at least "hostname" and may override any of the
+    shared credential/connection arguments for that host.
+
+    Example usage:
+        # Same key everywhere, check disk usage on a fleet
+        results = await ssh_execute_many_wrapper(
+            hosts=[{"hostname": "10.0.0.1"}, {"hostname": "10.0.0.2"}],
+            command="df -h",
+            username="deploy",
+            private_key_path="/path/to/key",
+        )
+
+        # Per-host credential overrides
+        results = await ssh_execute_many_wrapper(
+            hosts=[
+                {"hostname": "web1.example.com"},
+                {"hostname": "db1.example.com", "username": "postgres"},
+            ],
+            command="uptime",
+            username="admin",
+            password="secure_password",
+        )
+
+    Args:
+        hosts (list[dict]): Host specs; each needs "hostname" and may override
+            the shared arguments below
+        command (str): The shell command to execute on every host
+        max_concurrency (int, optional): Maximum simultaneous SSH executions (default: 50)
+        username (str, optional): SSH username (default: root)
+        password (str, optional): SSH password for password authentication
+        private_key (str, optional): Private key content as string
+        private_key_path (str, optional): Path to private key file
+        port (int, optional): SSH port number (default: 22)
+        timeout (int, optional): Per-command timeout in seconds (default: 30)
+        use_ssh_agent (bool, optional): Use SSH agent for key authentication (default: True)
+        compress (bool, optional): Enable SSH compression (default: False)
+
+    Returns:
+        list[Dict[str, Any]]: One ssh_execute-shaped response per host, in input order
+    """
+
+    return await ssh_execute_many(
+        hosts=hosts,
+        command=command,
+        max_concurrency=max_concurrency,
+        username=username,
+        password=password,
+        private_key=private_key,
+        private_key_path=private_key_path,
+        port=port,
+        timeout=timeout,
+        use_ssh_agent=use_ssh_agent,
+        compress=compress,
     )
 
 
 if __name__ == "__main__":
-    print("🚀 Starting Multi-Cloud DevOps MCP Server...")
+    logger.info("Starting Multi-Cloud DevOps MCP Server...")
 
-    # Test AWS credentials
-    try:
-        session = get_aws_session()
-        response = session.client("s3").list_buckets()
-        print("✅ AWS credentials validated successfully")
-    except Exception as e:
-        print(f"⚠️  AWS credential check failed: {e}")
-        print("ℹ️  AWS features will be available when credentials are provided via API")
+    # Probe all three providers concurrently; startup cost is max(rtt), not
+    # the sum of three sequential network round-trips
+    def _probe_aws():
+        # get_caller_identity is O(1) and unmetered, unlike listing buckets
+        get_aws_session().client("sts").get_caller_identity()
 
-    # Test Azure credentials
-    try:
+    def _probe_azure():
         credential, subscription_id = get_azure_credential()
         # Test credential by creating a simple client
-        resource_client = ResourceManagementClient(credential, subscription_id)
-        print("✅ Azure credentials validated successfully")
-    except Exception as e:
-        print(f"⚠️  Azure credential check failed: {e}")
-        print("ℹ️  Azure features will be available when credentials are provided via API")
-
-    # Test Hetzner Cloud credentials
-    try:
-        client = get_hetzner_client()
-        # Test client by getting server types (a simple, low-cost API call)
-        server_types = client.server_types.get_all()
-        print("✅ Hetzner Cloud credentials validated successfully")
-    except Exception as e:
-        print(f"⚠️  Hetzner Cloud credential check failed: {e}")
-        print("ℹ️  Hetzner Cloud features will be available when credentials are provided via API")
-
-    print("🌐 Supporting cloud providers: AWS, Azure, Hetzner Cloud")
-    print("🔐 Supporting protocols: SSH")
-    print(
-        "🔧 Available tools: boto3_execute_wrapper, azure_execute_wrapper, hetzner_execute_wrapper, ssh_execute_wrapper"
+        ResourceManagementClient(credential, subscription_id)
+
+    def _probe_hetzner():
+        # Bounded probe: one page of locations instead of the full catalog
+        get_hetzner_client().locations.get_list(page=1, per_page=1)
+
+    probes = {"AWS": _probe_aws, "Azure": _probe_azure, "Hetzner Cloud": _probe_hetzner}
+    with ThreadPoolExecutor(max_workers=len(probes)) as probe_pool:
+        futures = {probe_pool.submit(fn): name for name, fn in probes.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+                logger.info("%s credentials validated successfully", name)
+            except Exception as e:
+                logger.warning("%s credential check failed: %s", name, e)
+                logger.info("%s features will be available when credentials are provided via API", name)
+
+    logger.info("Supporting cloud providers: AWS, Azure, Hetzner Cloud")
+    logger.info("Supporting protocols: SSH")
+    logger.info(
+        "Available tools: boto3_execute_wrapper, azure_execute_wrapper, hetzner_execute_wrapper, "
+        "ssh_execute_wrapper, ssh_execute_many_wrapper"
     )
 
+    # Warm provider token caches in the background so the first tool call
+    # doesn't pay the AAD/STS exchange; the server starts serving immediately.
+    threading.Thread(target=lambda: asyncio.run(warm_providers()), daemon=True, name="provider-warmup").start()
+
     # Start the MCP server
     mcp.run(transport="sse", host="0.0.0.0", port=8080, path="/mcp")
@@ -1,22 +1,249 @@
 import ast
+import asyncio
+import inspect
+import os
+import re
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import CodeType, FunctionType
+from typing import Any, Callable, Dict, Tuple
 
+_DEBUG_TRACEBACKS = os.getenv("DEBUG", "").lower() in ("true", "1", "yes", "on")
 
-def sanitize_python_code(code_string: str) -> str:
+_provider_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_provider_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool used to run provider exec() work.
+
+    The asyncio default executor is capped at min(32, cpu_count + 4) workers and
+    is shared with every other run_in_executor call in the process; blocking SDK
+    calls of up to 30 seconds each would queue unrelated work behind them. This
+    pool is dedicated to provider code execution and sized for I/O-bound work
+    via PROVIDER_EXEC_POOL (default 64).
+    """
+    global _provider_executor
+    with _executor_lock:
+        if _provider_executor is None:
+            _provider_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("PROVIDER_EXEC_POOL", "64")),
+                thread_name_prefix="provider-exec",
+            )
+        return _provider_executor
+
+
+def error_payload(exc: Exception, include_traceback: bool = None) -> Dict[str, Any]:
+    """Build the standard error response for a failed tool call.
+
+    traceback.format_exc() walks the whole stack and reads source lines from disk,
+    which is wasted work when callers only surface the message. Include the full
+    traceback (capped at 20 frames) only when DEBUG is enabled or explicitly asked.
+    """
+    if include_traceback is None:
+        include_traceback = _DEBUG_TRACEBACKS
+    payload = {"success": False, "error": str(exc), "error_type": type(exc).__name__}
+    if include_traceback:
+        payload["traceback"] = "".join(traceback.TracebackException.from_exception(exc, limit=20).format())
+    return payload
+
+
+class _ThreadRoutedStream:
+    """File-like proxy that routes writes to a per-thread buffer when one is set.
+
+    contextlib.redirect_stdout swaps the process-global sys.stdout, so two
+    concurrent exec() calls on the provider pool would interleave their output
+    into each other's buffers. This proxy is installed once; each worker thread
+    points it at its own buffer for the duration of a call and everything else
+    falls through to the real stream.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def push(self, buffer) -> None:
+        self._local.buffer = buffer
+
+    def pop(self) -> None:
+        self._local.buffer = None
+
+    def write(self, s):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer if buffer is not None else self._fallback).write(s)
+
+    def flush(self):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer if buffer is not None else self._fallback).flush()
+
+    def __getattr__(self, name):
+        return getattr(self._fallback, name)
+
+
+_CAPTURE_CAP = int(os.getenv("CAPTURE_MAX_BYTES", str(1024 * 1024)))
+
+
+class _CappedBuffer:
+    """Write-only text buffer that stops retaining output past a size cap.
+
+    A chatty snippet (e.g. printing thousands of servers) could otherwise grow
+    an unbounded string in memory for the whole 30 s execution. Parts are kept
+    in a list and joined once, and anything past the cap is dropped with a
+    truncation marker appended to the final value.
+    """
+
+    __slots__ = ("_cap", "_parts", "_size", "_truncated")
+
+    def __init__(self, cap: int = _CAPTURE_CAP):
+        self._cap = cap
+        self._parts = []
+        self._size = 0
+        self._truncated = False
+
+    def write(self, s: str) -> int:
+        length = len(s)
+        if not self._truncated:
+            if self._size + length > self._cap:
+                s = s[: self._cap - self._size]
+                self._truncated = True
+            self._parts.append(s)
+            self._size += len(s)
+        return length
+
+    def flush(self) -> None:
+        pass
+
+    def getvalue(self) -> str:
+        value = "".join(self._parts)
+        if self._truncated:
+            value += "\n[...output truncated at {} bytes...]\n".format(self._cap)
+        return value
+
+
+_stdout_router = None
+_stderr_router = None
+_router_lock = threading.Lock()
+
+
+def _install_routers() -> None:
+    global _stdout_router, _stderr_router
+    with _router_lock:
+        if _stdout_router is None:
+            _stdout_router = _ThreadRoutedStream(sys.stdout)
+            _stderr_router = _ThreadRoutedStream(sys.stderr)
+            sys.stdout = _stdout_router
+            sys.stderr = _stderr_router
+
+
+def run_captured(func: Callable[[], Any]) -> Tuple[Any, str, str]:
+    """Run func() in the calling thread, capturing its stdout/stderr.
+
+    Returns (result, output, errors). Meant to be submitted to the provider
+    executor so the capture is scoped to that worker thread instead of mutating
+    process-global stdout/stderr state.
+    """
+    _install_routers()
+    output_capture = _CappedBuffer()
+    error_capture = _CappedBuffer()
+    _stdout_router.push(output_capture)
+    _stderr_router.push(error_capture)
     try:
-        # Normalize line endings
-        replacements = {"\\n": "\n", "\\t": "\t", "\\r": "\r", '\\"': '"', "\\'": "'", "\\\\": "\\"}
+        result = func()
+    finally:
+        _stdout_router.pop()
+        _stderr_router.pop()
+    return result, output_capture.getvalue(), error_capture.getvalue()
+
+
+def run_captured_tracked(func: Callable[[], Any], worker_info: Dict[str, int]) -> Tuple[Any, str, str]:
+    """run_captured, publishing the worker's thread id so callers can cancel it."""
+    worker_info["thread_id"] = threading.get_ident()
+    return run_captured(func)
+
+
+def interrupt_thread(thread_id) -> None:
+    """Inject TimeoutError into a worker thread that ran past its deadline.
+
+    wait_for only cancels the awaiting coroutine; the exec() keeps running in
+    its executor thread, holding a pool slot and connection capacity. The
+    async-exc hook delivers the exception at the next bytecode boundary, which
+    reclaims the thread for snippets stuck in Python-level loops (threads
+    blocked inside a C socket call are interrupted once they return to Python).
+    """
+    if not thread_id:
+        return
+    import ctypes
+
+    affected = ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(TimeoutError))
+    if affected > 1:
+        # Stale id matched more than one thread state; revert rather than
+        # killing unrelated workers.
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), None)
+
+
+@lru_cache(maxsize=256)
+def compile_user_code(code_string: str, filename: str = "<mcp>") -> CodeType:
+    """Compile user-supplied code once and cache the bytecode.
+
+    exec() re-parses and re-compiles a source string on every call; agents
+    frequently resubmit the same snippet, so caching the code object skips the
+    parser entirely on repeat invocations. Top-level await is allowed so
+    snippets can fan out SDK calls with asyncio.gather; see make_runner.
+    """
+    return compile(code_string, filename, "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
 
-        for literal, actual in replacements.items():
-            code_string = code_string.replace(literal, actual)
 
-        parsed_ast = ast.parse(code_string)
+def make_runner(code_obj: CodeType, namespace: Dict[str, Any]) -> Callable[[], Any]:
+    """Return a zero-arg callable that executes code_obj in namespace.
+
+    Plain snippets run through exec(). Snippets using top-level await compile
+    to a coroutine code object (the asyncio REPL trick): rebuild it as a
+    function and drive the coroutine with asyncio.run() on the worker thread,
+    keeping the capture, timeout, and cancellation machinery unchanged while
+    letting the snippet's own awaits run I/O concurrently.
+    """
+    if code_obj.co_flags & inspect.CO_COROUTINE:
+        return lambda: asyncio.run(FunctionType(code_obj, namespace)())
+    return lambda: exec(code_obj, namespace)
+
+
+# Literal escape sequences -> the characters they denote, applied in one regex
+# pass instead of six sequential str.replace scans over the source
+_ESCAPE_MAP = {"\\n": "\n", "\\t": "\t", "\\r": "\r", '\\"': '"', "\\'": "'", "\\\\": "\\"}
+_ESCAPE_RE = re.compile(r"\\[ntr\"'\\]")
+
+
+class _Sanitizer(ast.NodeVisitor):
+    """Rejects calls to disallowed builtins; only Call nodes cost Python work."""
+
+    _BAD = frozenset({"eval", "exec", "open", "subprocess.call"})
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in self._BAD:
+            raise ValueError(f"Calling '{func.id}' is not allowed.")
+        self.generic_visit(node)
+
+
+_sanitizer = _Sanitizer()
+
+
+@lru_cache(maxsize=512)
+def sanitize_python_code(code_string: str) -> str:
+    # Memoized: agents loop over near-identical snippets, and the escape pass +
+    # ast.parse dominates pre-I/O CPU time for small payloads. Rejected code
+    # raises, which lru_cache does not cache, so bad input is re-checked.
+    try:
+        # Normalize line endings (single pass, single allocation)
+        code_string = _ESCAPE_RE.sub(lambda m: _ESCAPE_MAP[m.group(0)], code_string)
 
-        # Iterate through the nodes and check for potentially unsafe constructs
-        for node in ast.walk(parsed_ast):
-            # Example: Disallow function calls to specific potentially dangerous functions
-            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
-                if node.func.id in ["eval", "exec", "open", "subprocess.call"]:
-                    raise ValueError(f"Calling '{node.func.id}' is not allowed.")
+        # Check for potentially unsafe constructs; the visitor only pays
+        # Python-level cost on Call nodes instead of materializing every node
+        # like ast.walk
+        _sanitizer.visit(ast.parse(code_string))
 
         # If no unsafe constructs are found, the code is considered sanitized
         return code_string